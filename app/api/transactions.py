@@ -1,16 +1,20 @@
 # app/api/transactions.py - backend api endpoints for transaction crud, filtering, etc.
 import logging
-from fastapi import APIRouter, UploadFile, HTTPException, Depends, Query, Form
+from fastapi import APIRouter, UploadFile, HTTPException, Depends, Query, Form, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from typing import Optional, List
+import asyncio
 import datetime
+import os
 import tempfile
 
 from app import schemas
 from app.crud import operations
 from app.database import SessionLocal
-from app.parsers import parse_csv
-from app.loaders import save_transactions
+from app.parsers import iter_csv
+from app.loaders import save_transaction_batches
 
 
 logger = logging.getLogger(__name__)
@@ -19,6 +23,7 @@ router = APIRouter(prefix="/transactions", tags=["transactions"])
 
 # Constants
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
 
 
 def get_db():
@@ -29,6 +34,17 @@ def get_db():
         db.close()
 
 
+def _run_in_own_session(fn, *args):
+    """Run fn(session, *args) in a short-lived session, so independent reads can run on separate connections."""
+    with SessionLocal() as session:
+        return fn(session, *args)
+
+
+def _get_metadata(db: Session):
+    """Cached cost centers and spend categories for filter responses."""
+    return operations.get_all_cost_centers(db), operations.get_all_spend_categories(db)
+
+
 # ============================================
 # CRUD OPERATIONS
 # ============================================
@@ -73,12 +89,15 @@ def delete_transaction(txn_id: int, db: Session = Depends(get_db)):
 # ============================================
 
 
-@router.get("/filter", response_model=schemas.PaginatedTransactionResponse)
-def filter_transactions(
+@router.get("/filter", response_model=schemas.PaginatedTransactionResponse, response_class=ORJSONResponse)
+async def filter_transactions(
     # Pagination
     page: int = Query(1, ge=1, description="Page number (1-indexed)"),
     page_size: int = Query(10000, ge=1, le=10000, description="Items per page"),
     
+    # Field projection
+    fields: Optional[List[str]] = Query(None, description="Transaction fields to return (default: all; id is always included)"),
+    
     # Text search
     search: Optional[str] = Query(None, description="Search in description field"),
     
@@ -100,10 +119,20 @@ def filter_transactions(
     """
     Filter transactions with flexible criteria and pagination.
     Returns compact transactions with IDs only for relationships to reduce bandwidth.
+    
+    Pass `fields` (e.g. `?fields=date&fields=amount&fields=description`) to return only
+    those transaction fields. Spend categories are only queried when `spend_category_ids`
+    is requested.
     """
-    # Build filtered query
-    query = operations.build_filter_query(
-        session=db,
+    requested_fields = None
+    if fields:
+        requested_fields = set(fields) | {"id"}
+        unknown = requested_fields - schemas.TransactionCompact.model_fields.keys()
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {sorted(unknown)}")
+    
+    # Build filtered SELECT
+    stmt = operations.build_filter_query(
         search=search,
         cost_center_ids=cost_center_ids,
         spend_category_ids=spend_category_ids,
@@ -114,41 +143,77 @@ def filter_transactions(
         max_amount=max_amount,
     )
     
-    # Get total count
-    total = query.count()
+    # Count, page (already compact dicts) and metadata are independent reads, so run
+    # them concurrently on the threadpool; count and page each get their own session
+    total, transactions, (cost_centers, spend_categories) = await asyncio.gather(
+        run_in_threadpool(_run_in_own_session, operations.count_filter_query, stmt),
+        run_in_threadpool(
+            _run_in_own_session, operations.paginate_filter_query, stmt, page, page_size, requested_fields
+        ),
+        run_in_threadpool(_get_metadata, db),
+    )
     total_pages = (total + page_size - 1) // page_size
     
-    # Get paginated results
-    transactions = query.offset((page - 1) * page_size).limit(page_size).all()
-    
-    # Convert to compact format
-    compact_transactions = [
-        schemas.TransactionCompact(
-            id=t.id,
-            date=t.date,
-            description=t.description,
-            amount=t.amount,
-            account=t.account,
-            cost_center_id=t.cost_center_id,
-            spend_category_ids=[cat.id for cat in t.spend_categories],
-            notes=t.notes,
-        )
-        for t in transactions
-    ]
-    
-    # Get metadata (cost centers and spend categories) once
-    cost_centers = operations.get_all_cost_centers(db)
-    spend_categories = operations.get_all_spend_categories(db)
-    
-    return {
-        "transactions": compact_transactions,
-        "cost_centers": cost_centers,
-        "spend_categories": spend_categories,
+    # Rows are built server-side, so skip response_model validation and serialize with orjson
+    return ORJSONResponse({
+        "transactions": transactions,
+        "cost_centers": [cc.model_dump() for cc in cost_centers],
+        "spend_categories": [sc.model_dump() for sc in spend_categories],
         "page": page,
         "page_size": page_size,
         "total": total,
         "total_pages": total_pages,
-    }
+    })
+
+
+@router.get("/filter_cursor", response_model=schemas.CursorTransactionResponse, response_class=ORJSONResponse)
+def filter_transactions_cursor(
+    # Cursor (both or neither; taken from the previous page's next_cursor)
+    cursor_date: Optional[datetime.date] = Query(None, description="Date of the last transaction on the previous page"),
+    cursor_id: Optional[int] = Query(None, description="ID of the last transaction on the previous page"),
+    limit: int = Query(100, ge=1, le=1000, description="Items per page"),
+    
+    # Same filters as /filter endpoint
+    search: Optional[str] = Query(None, description="Search in description field"),
+    cost_center_ids: Optional[List[int]] = Query(None, description="Filter by cost center IDs"),
+    spend_category_ids: Optional[List[int]] = Query(None, description="Filter by spend category IDs"),
+    account: Optional[List[str]] = Query(None, description="Filter by account names"),
+    start_date: Optional[datetime.date] = Query(None, description="Start date (inclusive)"),
+    end_date: Optional[datetime.date] = Query(None, description="End date (inclusive)"),
+    min_amount: Optional[float] = Query(None, description="Minimum amount"),
+    max_amount: Optional[float] = Query(None, description="Maximum amount"),
+    
+    db: Session = Depends(get_db),
+):
+    """
+    Filter transactions with keyset (cursor) pagination, newest first.
+    Skips the total count, so page cost stays constant for infinite scroll.
+    Use /filter when exact totals are needed.
+    """
+    if (cursor_date is None) != (cursor_id is None):
+        raise HTTPException(status_code=400, detail="cursor_date and cursor_id must be provided together")
+    
+    stmt = operations.build_filter_query(
+        search=search,
+        cost_center_ids=cost_center_ids,
+        spend_category_ids=spend_category_ids,
+        account=account,
+        start_date=start_date,
+        end_date=end_date,
+        min_amount=min_amount,
+        max_amount=max_amount,
+    )
+    stmt = operations.build_cursor_query(stmt, cursor_date, cursor_id)
+    
+    transactions, next_cursor = operations.paginate_cursor_query(db, stmt, limit)
+    
+    return ORJSONResponse({
+        "transactions": transactions,
+        "cost_centers": [cc.model_dump() for cc in operations.get_all_cost_centers(db)],
+        "spend_categories": [sc.model_dump() for sc in operations.get_all_spend_categories(db)],
+        "limit": limit,
+        "next_cursor": next_cursor,
+    })
 
 
 # ============================================
@@ -173,9 +238,8 @@ def get_analytics(
     Compute analytics for filtered transactions.
     Supports the same filters as the /filter endpoint.
     """
-    # Get filtered transactions
-    transactions = operations.get_transactions(
-        session=db,
+    # Build filtered SELECT
+    stmt = operations.build_filter_query(
         search=search,
         cost_center_ids=cost_center_ids,
         spend_category_ids=spend_category_ids,
@@ -187,7 +251,7 @@ def get_analytics(
     )
     
     # Compute analytics
-    analytics = operations.compute_analytics(transactions)
+    analytics = operations.compute_analytics(db, stmt)
     
     return analytics
 
@@ -198,16 +262,24 @@ def get_analytics(
 
 
 @router.get("/cost_centers", response_model=schemas.CostCenterListResponse)
-def get_cost_centers(db: Session = Depends(get_db)):
-    """Get all cost centers for filter dropdowns."""
-    cost_centers = operations.get_all_cost_centers(db)
+def get_cost_centers(request: Request, response: Response, db: Session = Depends(get_db)):
+    """Get all cost centers for filter dropdowns. Supports If-None-Match (304)."""
+    cost_centers, etag = operations.get_cost_centers_with_etag(db)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
     return {"cost_centers": cost_centers, "count": len(cost_centers)}
 
 
 @router.get("/spend_categories", response_model=schemas.SpendCategoryListResponse)
-def get_spend_categories(db: Session = Depends(get_db)):
-    """Get all spend categories for filter dropdowns."""
-    categories = operations.get_all_spend_categories(db)
+def get_spend_categories(request: Request, response: Response, db: Session = Depends(get_db)):
+    """Get all spend categories for filter dropdowns. Supports If-None-Match (304)."""
+    categories, etag = operations.get_spend_categories_with_etag(db)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    response.headers["ETag"] = etag
     return {"spend_categories": categories, "count": len(categories)}
 
 
@@ -244,34 +316,40 @@ async def upload_csv(
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV")
     
-    # Read and validate file size
-    content = await file.read()
-    if len(content) > MAX_FILE_SIZE:
+    # Stream to temporary file in chunks, validating size as we go
+    size = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp:
+        tmp_path = tmp.name
+        try:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    break
+                tmp.write(chunk)
+        except BaseException:
+            # Don't leave a partial file behind if reading the upload fails
+            tmp.close()
+            os.unlink(tmp_path)
+            raise
+    
+    if size > MAX_FILE_SIZE:
+        os.unlink(tmp_path)
         raise HTTPException(
             status_code=413, 
             detail=f"File too large. Maximum size is {MAX_FILE_SIZE / (1024*1024):.0f}MB"
         )
-    
-    # Write to temporary file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp:
-        tmp.write(content)
-        tmp_path = tmp.name
 
     try:
-        # Parse CSV (includes row-by-row validation)
-        transactions = parse_csv(tmp_path, institution)
+        # Parse (with row-by-row validation) and save in batches, all in one database
+        # transaction: if any row fails validation or any save fails, the entire
+        # upload is rolled back
+        count = save_transaction_batches(iter_csv(tmp_path, institution), db)
         
-        logger.info(f"Parsed {len(transactions)} transactions from {institution} CSV")
-        
-        # Save all transactions in one database transaction
-        # If any save fails, entire upload is rolled back
-        save_transactions(transactions, db)
-        
-        logger.info(f"Successfully saved {len(transactions)} transactions from {institution}")
+        logger.info(f"Successfully saved {count} transactions from {institution}")
         
         return {
-            "message": f"Successfully loaded {len(transactions)} transactions",
-            "count": len(transactions),
+            "message": f"Successfully loaded {count} transactions",
+            "count": count,
             "institution": institution
         }
         
@@ -283,3 +361,9 @@ async def upload_csv(
         # Unexpected errors
         logger.error(f"Failed to process CSV from {institution}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to process CSV: {str(e)}")
+    finally:
+        # Remove the temp file whether the upload succeeded or failed
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,56 @@
+# app/cache.py - small in-process caches for rarely-changing metadata (cost centers, spend categories, accounts)
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple
+
+
+class VersionedCache:
+    """
+    Caches a single value for `ttl` seconds, along with an ETag of its contents.
+
+    Call bump() after committing a change to the underlying table. Bumping drops the
+    cached value and increments the version, so a load that started before the
+    bump can't store its stale result.
+    """
+
+    def __init__(self, ttl: float = 60):
+        self.ttl = ttl
+        self.version = 0
+        self._value: Any = None
+        self._etag: Optional[str] = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def get_or_load(self, loader: Callable[[], Any]) -> Tuple[Any, str]:
+        """
+        Return (value, etag), calling loader() on a miss or after expiry.
+        The ETag is a hash of repr(value), so it changes only when the contents do.
+        """
+        with self._lock:
+            if self._etag is not None and time.monotonic() < self._expires:
+                return self._value, self._etag
+            version = self.version
+
+        value = loader()
+        etag = f'"{hashlib.md5(repr(value).encode()).hexdigest()}"'
+
+        with self._lock:
+            if version == self.version:
+                self._value = value
+                self._etag = etag
+                self._expires = time.monotonic() + self.ttl
+
+        return value, etag
+
+    def bump(self) -> None:
+        """Invalidate the cached value."""
+        with self._lock:
+            self.version += 1
+            self._value = None
+            self._etag = None
+
+
+cost_center_cache = VersionedCache()
+spend_category_cache = VersionedCache()
+account_cache = VersionedCache()
@@ -1,13 +1,15 @@
 # app/crud/operations.py - database CRUD operations
 import logging
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, case, delete, event, exists, func, insert, inspect, lambda_stmt, select, tuple_
+from sqlalchemy.orm import Session, object_session, selectinload, joinedload
 from sqlalchemy.exc import SQLAlchemyError
-from typing import List, Optional, Union
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
 from datetime import date
-from collections import defaultdict
 
 from app import schemas
-from app.models import Transaction, SpendCategory, CostCenter
+from app.cache import account_cache, cost_center_cache, spend_category_cache
+from app.database import search_index_ready
+from app.models import Transaction, SpendCategory, CostCenter, transaction_spend_categories, transactions_fts
 
 
 logger = logging.getLogger(__name__)
@@ -39,6 +41,16 @@ def create_transaction(db: Session, txn: schemas.TransactionCreate) -> Transacti
     return new_tx
 
 
+def bulk_resolve_cost_centers(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    """Get or create cost centers by (already cleaned) name in bulk. Returns {name: id}."""
+    return _bulk_resolve_names(db, CostCenter, names)
+
+
+def bulk_resolve_spend_categories(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    """Get or create spend categories by (already cleaned) name in bulk. Returns {name: id}."""
+    return _bulk_resolve_names(db, SpendCategory, names)
+
+
 # ============================================
 # READ
 # ============================================
@@ -56,12 +68,15 @@ def get_transactions(
     max_amount: Optional[float] = None,
 ) -> List[Transaction]:
     """The ONE query function that handles all filtering."""
-    query = session.query(Transaction)
+    # Eager-load relationships so serializers/analytics don't lazy-load per row
+    query = session.query(Transaction).options(
+        joinedload(Transaction.cost_center),
+        selectinload(Transaction.spend_categories),
+    )
     
     # Apply filters
     if search:
-        # Safe: SQLAlchemy parameterizes .ilike() to prevent SQL injection
-        query = query.filter(Transaction.description.ilike(f"%{search}%"))
+        query = query.filter(_search_clause(search))
 
     if cost_center_ids:
         ids = [cost_center_ids] if isinstance(cost_center_ids, int) else cost_center_ids
@@ -91,7 +106,6 @@ def get_transactions(
 
 
 def build_filter_query(
-    session: Session,
     search: Optional[str] = None,
     cost_center_ids: Optional[Union[int, List[int]]] = None,
     spend_category_ids: Optional[Union[int, List[int]]] = None,
@@ -100,38 +114,105 @@ def build_filter_query(
     end_date: Optional[date] = None,
     min_amount: Optional[float] = None,
     max_amount: Optional[float] = None,
-):
-    """Build filtered query without executing. Used for pagination."""
-    query = session.query(Transaction)
+) -> Select:
+    """
+    Build a filtered SELECT without executing it. Used for pagination and analytics.
+    Callers re-base it with .with_only_columns() to fetch just the columns they need.
+    """
+    stmt = select(Transaction)
     
     if search:
-        query = query.filter(Transaction.description.ilike(f"%{search}%"))
+        stmt = stmt.where(_search_clause(search))
 
     if cost_center_ids:
         ids = [cost_center_ids] if isinstance(cost_center_ids, int) else cost_center_ids
-        query = query.filter(Transaction.cost_center_id.in_(ids))
+        stmt = stmt.where(Transaction.cost_center_id.in_(ids))
 
     if spend_category_ids:
         ids = [spend_category_ids] if isinstance(spend_category_ids, int) else spend_category_ids
-        query = query.filter(Transaction.spend_categories.any(SpendCategory.id.in_(ids)))
+        stmt = stmt.where(Transaction.spend_categories.any(SpendCategory.id.in_(ids)))
     
     if account:
         accounts = [account] if isinstance(account, str) else account
-        query = query.filter(Transaction.account.in_(accounts))
+        stmt = stmt.where(Transaction.account.in_(accounts))
 
     if start_date:
-        query = query.filter(Transaction.date >= start_date)
+        stmt = stmt.where(Transaction.date >= start_date)
 
     if end_date:
-        query = query.filter(Transaction.date <= end_date)
+        stmt = stmt.where(Transaction.date <= end_date)
     
     if min_amount is not None:
-        query = query.filter(Transaction.amount >= min_amount)
+        stmt = stmt.where(Transaction.amount >= min_amount)
 
     if max_amount is not None:
-        query = query.filter(Transaction.amount <= max_amount)
+        stmt = stmt.where(Transaction.amount <= max_amount)
+    
+    return stmt
+
+
+def count_filter_query(session: Session, stmt: Select) -> int:
+    """Count the rows matched by a filtered SELECT."""
+    return session.scalar(select(func.count()).select_from(stmt.with_only_columns(Transaction.id).subquery()))
+
+
+def paginate_filter_query(
+    session: Session,
+    stmt: Select,
+    page: int,
+    page_size: int,
+    fields: Optional[Set[str]] = None,
+) -> List[dict]:
+    """
+    Fetch one page of a filtered SELECT as compact transaction dicts, using a deferred join.
+    
+    Only transaction IDs are sorted and skipped by OFFSET; the requested columns are
+    then fetched for the IDs on the page.
+    
+    Args:
+        fields: Compact field names to return (None = all). Spend categories are
+            only queried when "spend_category_ids" is requested.
+    """
+    ids = session.scalars(
+        stmt.with_only_columns(Transaction.id)
+        .order_by(Transaction.id.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    ).all()
     
-    return query
+    return _load_compact_rows(session, ids, fields)
+
+
+def build_cursor_query(stmt: Select, cursor_date: Optional[date] = None, cursor_id: Optional[int] = None) -> Select:
+    """
+    Apply keyset pagination (newest first) to a filtered SELECT.
+    The cursor is the (date, id) of the last transaction on the previous page.
+    """
+    if cursor_date is not None and cursor_id is not None:
+        stmt = stmt.where(tuple_(Transaction.date, Transaction.id) < tuple_(cursor_date, cursor_id))
+    
+    return stmt.order_by(Transaction.date.desc(), Transaction.id.desc())
+
+
+def paginate_cursor_query(session: Session, stmt: Select, limit: int) -> Tuple[List[dict], Optional[dict]]:
+    """
+    Fetch one page from a cursor SELECT without counting the full result set.
+    
+    Returns:
+        (compact transaction dicts, next_cursor) where next_cursor is None on the last page
+    """
+    # Fetch one extra ID to find out whether another page exists
+    ids = session.scalars(stmt.with_only_columns(Transaction.id).limit(limit + 1)).all()
+    has_more = len(ids) > limit
+    
+    rows = _load_compact_rows(session, ids[:limit])
+    
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = {"date": last["date"], "id": last["id"]}
+    
+    return rows, next_cursor
 
 
 # ============================================
@@ -147,7 +228,7 @@ def update_transaction(db: Session, tx_id: int, txn: schemas.TransactionUpdate):
     
     # Store old cost center/spend categories for cleanup
     old_cost_center_id = existing.cost_center_id
-    old_spend_categories = list(existing.spend_categories)
+    old_spend_category_ids = [category.id for category in existing.spend_categories]
     
     # Update fields
     update_data = txn.model_dump(exclude_unset=True)
@@ -171,7 +252,7 @@ def update_transaction(db: Session, tx_id: int, txn: schemas.TransactionUpdate):
         _cleanup_orphaned_cost_center(db, old_cost_center_id)
     
     # Cleanup orphaned categories
-    _cleanup_orphaned_spend_categories(db, old_spend_categories)
+    _cleanup_orphaned_spend_categories(db, old_spend_category_ids)
 
     return existing
 
@@ -189,7 +270,7 @@ def delete_transaction(db: Session, tx_id: int) -> bool:
     
     # Store references before deletion
     old_cost_center_id = tx.cost_center_id
-    old_spend_categories = list(tx.spend_categories)
+    old_spend_category_ids = [category.id for category in tx.spend_categories]
     
     # Delete the transaction
     db.delete(tx)
@@ -200,7 +281,7 @@ def delete_transaction(db: Session, tx_id: int) -> bool:
         _cleanup_orphaned_cost_center(db, old_cost_center_id)
 
     # Cleanup orphaned spend categories
-    _cleanup_orphaned_spend_categories(db, old_spend_categories)
+    _cleanup_orphaned_spend_categories(db, old_spend_category_ids)
     
     return True
 
@@ -210,19 +291,63 @@ def delete_transaction(db: Session, tx_id: int) -> bool:
 # ============================================
 
 
-def get_all_cost_centers(session: Session) -> List[CostCenter]:
-    """Get all cost centers."""
-    return session.query(CostCenter).order_by(CostCenter.name).all()
+def get_all_cost_centers(session: Session) -> List[schemas.CostCenterWithID]:
+    """Get all cost centers (cached)."""
+    return get_cost_centers_with_etag(session)[0]
+
+
+def get_all_spend_categories(session: Session) -> List[schemas.SpendCategoryWithID]:
+    """Get all spend categories (cached)."""
+    return get_spend_categories_with_etag(session)[0]
 
 
-def get_all_spend_categories(session: Session) -> List[SpendCategory]:
-    """Get all spend categories."""
-    return session.query(SpendCategory).order_by(SpendCategory.name).all()
+def get_cost_centers_with_etag(session: Session) -> Tuple[List[schemas.CostCenterWithID], str]:
+    """Get all cost centers (cached) plus an ETag of the list."""
+    return cost_center_cache.get_or_load(lambda: [
+        schemas.CostCenterWithID.model_validate(cc)
+        for cc in session.query(CostCenter).order_by(CostCenter.name).all()
+    ])
+
+
+def get_spend_categories_with_etag(session: Session) -> Tuple[List[schemas.SpendCategoryWithID], str]:
+    """Get all spend categories (cached) plus an ETag of the list."""
+    return spend_category_cache.get_or_load(lambda: [
+        schemas.SpendCategoryWithID.model_validate(sc)
+        for sc in session.query(SpendCategory).order_by(SpendCategory.name).all()
+    ])
 
 
 def get_unique_accounts(session: Session) -> List[str]:
-    """Get all unique account names."""
-    return [acc for (acc,) in session.query(Transaction.account).distinct().order_by(Transaction.account).all()]
+    """Get all unique account names (cached; DISTINCT is served by the account index)."""
+    accounts, _ = account_cache.get_or_load(
+        lambda: session.scalars(select(Transaction.account).distinct().order_by(Transaction.account)).all()
+    )
+    return accounts
+
+
+# Invalidate the account cache once a commit has added, changed, or removed a transaction's account.
+# (Bulk inserts in loaders.save_transaction_batches bypass these hooks and bump the cache themselves.)
+@event.listens_for(Transaction, "after_insert")
+@event.listens_for(Transaction, "after_delete")
+def _mark_accounts_changed(mapper, connection, target) -> None:
+    object_session(target).info["accounts_changed"] = True
+
+
+@event.listens_for(Transaction, "after_update")
+def _mark_account_updated(mapper, connection, target) -> None:
+    if inspect(target).attrs.account.history.has_changes():
+        object_session(target).info["accounts_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_account_cache(session: Session) -> None:
+    if session.info.pop("accounts_changed", False):
+        account_cache.bump()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_account_changes(session: Session) -> None:
+    session.info.pop("accounts_changed", None)
 
 
 # ============================================
@@ -230,17 +355,31 @@ def get_unique_accounts(session: Session) -> List[str]:
 # ============================================
 
 
-def compute_analytics(transactions: List[Transaction]) -> dict:
+# Rows fetched per round trip while streaming the balance timeline
+TIMELINE_BATCH_SIZE = 2048
+
+# SQL expressions shared by the analytics aggregations
+_EXPENSE = case((Transaction.amount < 0, Transaction.amount), else_=0.0)
+_INCOME = case((Transaction.amount >= 0, Transaction.amount), else_=0.0)
+
+
+def compute_analytics(session: Session, stmt: Select) -> dict:
     """
-    Compute analytics from a list of transactions.
+    Compute analytics for a filtered SELECT.
+    
+    Totals and groupings are aggregated in SQL; only the balance timeline
+    walks individual transactions.
     
     Args:
-        transactions: List of Transaction objects (already filtered)
+        session: Database session
+        stmt: Filtered SELECT (from build_filter_query)
     
     Returns:
         Dictionary with analytics data including balance timeline
     """
-    if not transactions:
+    totals = _compute_totals(session, stmt)
+    
+    if not totals["count"]:
         return {
             "total_spent": 0.0,
             "total_income": 0.0,
@@ -256,145 +395,236 @@ def compute_analytics(transactions: List[Transaction]) -> dict:
             "balance_timeline": [],
         }
     
-    # Calculate totals
-    expenses = [t.amount for t in transactions if t.amount < 0]
-    incomes = [t.amount for t in transactions if t.amount > 0]
-    
-    total_spent = sum(expenses) * -1
-    total_income = sum(incomes)
-    
-    # Group by month with cost center breakdown
-    monthly_data = defaultdict(lambda: {
-        "total": 0.0,
-        "expenses": 0.0,
-        "income": 0.0,
-        "count": 0,
-        "by_cost_center": defaultdict(float)  # NEW - for tooltips
-    })
-    for t in transactions:
-        month_key = t.date.strftime("%Y-%m")
-        monthly_data[month_key]["total"] += t.amount
-        monthly_data[month_key]["count"] += 1
-        if t.amount < 0:
-            monthly_data[month_key]["expenses"] += t.amount
-            # Track expenses by cost center for tooltip breakdown
-            monthly_data[month_key]["by_cost_center"][t.cost_center.name] += t.amount
-        else:
-            monthly_data[month_key]["income"] += t.amount
-    
-    # Group by cost center
-    cost_center_data = defaultdict(lambda: {
-        "id": None, "name": None, "total": 0.0, "expenses": 0.0, "income": 0.0, "count": 0
-    })
-    for t in transactions:
-        cc_id = t.cost_center_id
-        if cost_center_data[cc_id]["id"] is None:
-            cost_center_data[cc_id]["id"] = t.cost_center_id
-            cost_center_data[cc_id]["name"] = t.cost_center.name
-        
-        cost_center_data[cc_id]["total"] += t.amount
-        cost_center_data[cc_id]["count"] += 1
-        if t.amount < 0:
-            cost_center_data[cc_id]["expenses"] += t.amount
-        else:
-            cost_center_data[cc_id]["income"] += t.amount
-    
-    # Group by spend category
-    spend_category_data = defaultdict(lambda: {
-        "id": None, "name": None, "total": 0.0, "expenses": 0.0, "income": 0.0, "count": 0
-    })
-    for t in transactions:
-        for cat in t.spend_categories:
-            cat_id = cat.id
-            if spend_category_data[cat_id]["id"] is None:
-                spend_category_data[cat_id]["id"] = cat.id
-                spend_category_data[cat_id]["name"] = cat.name
-            
-            spend_category_data[cat_id]["total"] += t.amount
-            spend_category_data[cat_id]["count"] += 1
-            if t.amount < 0:
-                spend_category_data[cat_id]["expenses"] += t.amount
-            else:
-                spend_category_data[cat_id]["income"] += t.amount
-    
-    # Get unique cost centers and spend categories
-    unique_cost_centers = set(t.cost_center_id for t in transactions)
-    unique_spend_categories = set(cat.id for t in transactions for cat in t.spend_categories)
-    
-    # NEW: Compute balance timeline
-    # Sort transactions chronologically by (date, id) for deterministic ordering
-    sorted_txns = sorted(transactions, key=lambda t: (t.date, t.id))
+    monthly_spending = _compute_monthly_spending(session, stmt)
+    cost_center_spending = _compute_cost_center_spending(session, stmt)
+    spend_category_stats = _compute_spend_category_stats(session, stmt)
+    
+    # Stream timeline columns in chronological (date, id) order, folding the running
+    # balance in one pass instead of materializing the whole result set first
+    rows = session.execute(
+        stmt.join(Transaction.cost_center).with_only_columns(
+            Transaction.date,
+            Transaction.amount,
+            Transaction.description,
+            CostCenter.name.label("cost_center_name"),
+        )
+        .order_by(Transaction.date, Transaction.id)
+        .execution_options(yield_per=TIMELINE_BATCH_SIZE)
+    )
+    
     balance = 0.0
     balance_timeline = []
-    
-    for t in sorted_txns:
-        balance += t.amount
+    for r in rows:
+        balance += r.amount
         balance_timeline.append({
-            "date": t.date,
+            "date": r.date,
             "balance": balance,
-            "description": t.description,
-            "amount": t.amount,
-            "cost_center_name": t.cost_center.name,
+            "description": r.description,
+            "amount": r.amount,
+            "cost_center_name": r.cost_center_name,
         })
     
-    # total_cash is the final balance (last point in timeline)
-    final_balance = balance_timeline[-1]["balance"] if balance_timeline else 0.0
+    return {
+        "total_spent": totals["expenses"] * -1,
+        "total_income": totals["income"],
+        "total_cash": balance,  # Final balance (last point in timeline)
+        "total_transactions": totals["count"],
+        "total_cost_centers": totals["cost_centers"],
+        "total_spend_categories": len(spend_category_stats),
+        "avg_expense": totals["expenses"] / totals["expense_count"] if totals["expense_count"] else 0.0,
+        "avg_income": totals["income"] / totals["income_count"] if totals["income_count"] else 0.0,
+        "monthly_spending": monthly_spending,
+        "cost_center_spending": cost_center_spending,
+        "spend_category_stats": spend_category_stats,
+        "balance_timeline": balance_timeline,
+    }
+
+
+def _compute_totals(session: Session, stmt: Select) -> dict:
+    """Aggregate overall totals for a filtered SELECT."""
+    row = session.execute(stmt.with_only_columns(
+        func.count(Transaction.id),
+        func.sum(case((Transaction.amount < 0, Transaction.amount))),
+        func.count(case((Transaction.amount < 0, 1))),
+        func.sum(case((Transaction.amount > 0, Transaction.amount))),
+        func.count(case((Transaction.amount > 0, 1))),
+        func.count(Transaction.cost_center_id.distinct()),
+    )).one()
     
     return {
-        "total_spent": total_spent,
-        "total_income": total_income,
-        "total_cash": final_balance,  # Updated to use timeline's final balance
-        "total_transactions": len(transactions),
-        "total_cost_centers": len(unique_cost_centers),
-        "total_spend_categories": len(unique_spend_categories),
-        "avg_expense": sum(expenses) / len(expenses) if expenses else 0.0,
-        "avg_income": sum(incomes) / len(incomes) if incomes else 0.0,
-        "monthly_spending": [
-            {
-                "month": month,
-                "total": data["total"],
-                "expense_total": data["expenses"],
-                "income_total": data["income"],
-                "transaction_count": data["count"],
-                "by_cost_center": dict(data["by_cost_center"]),  # Convert defaultdict to dict
-            }
-            for month, data in sorted(monthly_data.items())  # Sorted by month ASC
-        ],
-        # Sort by expense ASC because expenses are negative
-        # -500 < -100, so ASC gives us biggest spending first
-        "cost_center_spending": [
-            {
-                "cost_center_id": data["id"],
-                "cost_center_name": data["name"],
-                "total": data["total"],
-                "expense_total": data["expenses"],
-                "income_total": data["income"],
-                "transaction_count": data["count"],
-            }
-            for data in sorted(cost_center_data.values(), key=lambda x: x["expenses"])  # Sorted by expense ASC
-        ],
-        # Sort by expense ASC because expenses are negative
-        # -500 < -100, so ASC gives us biggest spending first
-        "spend_category_stats": [
-            {
-                "spend_category_id": data["id"],
-                "spend_category_name": data["name"],
-                "total": data["total"],
-                "expense_total": data["expenses"],
-                "income_total": data["income"],
-                "transaction_count": data["count"],
-            }
-            for data in sorted(spend_category_data.values(), key=lambda x: x["expenses"])  # Sorted by expense ASC
-        ],
-        "balance_timeline": balance_timeline,  # NEW
+        "count": row[0],
+        "expenses": row[1] or 0.0,
+        "expense_count": row[2],
+        "income": row[3] or 0.0,
+        "income_count": row[4],
+        "cost_centers": row[5],
     }
 
 
+def _compute_monthly_spending(session: Session, stmt: Select) -> List[dict]:
+    """Aggregate spending by month (YYYY-MM)."""
+    month = func.strftime("%Y-%m", Transaction.date)
+    rows = session.execute(stmt.with_only_columns(
+        month,
+        func.sum(Transaction.amount),
+        func.sum(_EXPENSE),
+        func.sum(_INCOME),
+        func.count(Transaction.id),
+    ).group_by(month).order_by(month)).all()
+    
+    # Expense breakdown by cost center per month (for tooltips)
+    breakdown_rows = session.execute(stmt.join(Transaction.cost_center).where(Transaction.amount < 0).with_only_columns(
+        month,
+        CostCenter.name,
+        func.sum(Transaction.amount),
+    ).group_by(month, CostCenter.id)).all()
+    
+    by_cost_center = {}
+    for month_key, name, expenses in breakdown_rows:
+        by_cost_center.setdefault(month_key, {})[name] = expenses
+    
+    return [
+        {
+            "month": month_key,
+            "total": total,
+            "expense_total": expenses,
+            "income_total": income,
+            "transaction_count": count,
+            "by_cost_center": by_cost_center.get(month_key, {}),
+        }
+        for month_key, total, expenses, income, count in rows  # Sorted by month ASC
+    ]
+
+
+def _compute_cost_center_spending(session: Session, stmt: Select) -> List[dict]:
+    """Aggregate spending by cost center."""
+    expenses = func.sum(_EXPENSE)
+    
+    # Sort by expense ASC because expenses are negative
+    # -500 < -100, so ASC gives us biggest spending first
+    # Ties (e.g. income-only cost centers at 0.0) are ordered by cost center ID
+    rows = session.execute(stmt.join(Transaction.cost_center).with_only_columns(
+        CostCenter.id,
+        CostCenter.name,
+        func.sum(Transaction.amount),
+        expenses,
+        func.sum(_INCOME),
+        func.count(Transaction.id),
+    ).group_by(CostCenter.id).order_by(expenses, CostCenter.id)).all()
+    
+    return [
+        {
+            "cost_center_id": cc_id,
+            "cost_center_name": name,
+            "total": total,
+            "expense_total": expenses,
+            "income_total": income,
+            "transaction_count": count,
+        }
+        for cc_id, name, total, expenses, income, count in rows
+    ]
+
+
+def _compute_spend_category_stats(session: Session, stmt: Select) -> List[dict]:
+    """Aggregate spending by spend category (a transaction counts toward each of its categories)."""
+    expenses = func.sum(_EXPENSE)
+    
+    # Sort by expense ASC because expenses are negative; ties are ordered by spend category ID
+    rows = session.execute(stmt.join(Transaction.spend_categories).with_only_columns(
+        SpendCategory.id,
+        SpendCategory.name,
+        func.sum(Transaction.amount),
+        expenses,
+        func.sum(_INCOME),
+        func.count(Transaction.id),
+    ).group_by(SpendCategory.id).order_by(expenses, SpendCategory.id)).all()
+    
+    return [
+        {
+            "spend_category_id": sc_id,
+            "spend_category_name": name,
+            "total": total,
+            "expense_total": expenses,
+            "income_total": income,
+            "transaction_count": count,
+        }
+        for sc_id, name, total, expenses, income, count in rows
+    ]
+
+
 # ============================================
 # INTERNAL HELPERS
 # ============================================
 
 
+def _search_clause(search: str):
+    """Case-insensitive substring match on description, via the trigram index when available."""
+    # Safe: SQLAlchemy parameterizes .like()/.ilike() to prevent SQL injection
+    if search_index_ready():
+        return Transaction.id.in_(
+            select(transactions_fts.c.rowid).where(transactions_fts.c.description.like(f"%{search}%"))
+        )
+    return Transaction.description.ilike(f"%{search}%")
+
+
+# Columns of schemas.TransactionCompact (spend_category_ids comes from the link table)
+_COMPACT_COLUMNS = {
+    "id": Transaction.id,
+    "date": Transaction.date,
+    "description": Transaction.description,
+    "amount": Transaction.amount,
+    "account": Transaction.account,
+    "cost_center_id": Transaction.cost_center_id,
+    "notes": Transaction.notes,
+}
+
+
+def _load_compact_rows(session: Session, ids: List[int], fields: Optional[Set[str]] = None) -> List[dict]:
+    """Fetch compact transaction dicts for the given IDs (in that order) without ORM hydration."""
+    if not ids:
+        return []
+    
+    # lambda_stmt caches the constructed statement per column set, so repeat pages
+    # skip rebuilding it; the ID list is extracted as an expanding bound parameter
+    columns = tuple(column for name, column in _COMPACT_COLUMNS.items() if fields is None or name in fields)
+    stmt = lambda_stmt(lambda: select(*columns), track_on=[columns])
+    stmt += lambda s: s.where(Transaction.id.in_(ids))
+    rows = {row["id"]: dict(row) for row in session.execute(stmt).mappings()}
+    
+    if fields is None or "spend_category_ids" in fields:
+        for row in rows.values():
+            row["spend_category_ids"] = []
+        links = session.execute(lambda_stmt(
+            lambda: select(transaction_spend_categories.c.transaction_id, transaction_spend_categories.c.spend_category_id)
+            .where(transaction_spend_categories.c.transaction_id.in_(ids))
+        ))
+        for transaction_id, spend_category_id in links:
+            rows[transaction_id]["spend_category_ids"].append(spend_category_id)
+    
+    # IN (...) does not preserve order, so restore the page order
+    return [rows[txn_id] for txn_id in ids]
+
+
+def _bulk_resolve_names(db: Session, model, names: Iterable[str]) -> Dict[str, int]:
+    """
+    One SELECT for existing names, then one executemany INSERT for the rest and one
+    SELECT for their new IDs. (No RETURNING, so this works on SQLite older than 3.35.)
+    Does not commit; callers bump the matching metadata cache after committing.
+    """
+    names = list(dict.fromkeys(names))  # Deduplicate, keeping first-seen order for new IDs
+    if not names:
+        return {}
+    
+    resolved = dict(db.query(model.name, model.id).filter(model.name.in_(names)).all())
+    
+    missing = [name for name in names if name not in resolved]
+    if missing:
+        db.execute(insert(model), [{"name": name} for name in missing])
+        resolved.update(db.query(model.name, model.id).filter(model.name.in_(missing)).all())
+    
+    return resolved
+
+
 def _get_or_create_cost_center(db: Session, name: Optional[str]) -> CostCenter:
     """Get or create a cost center."""
     if not name or not name.strip():
@@ -406,6 +636,7 @@ def _get_or_create_cost_center(db: Session, name: Optional[str]) -> CostCenter:
         db.add(cost_center)
         db.commit()
         db.refresh(cost_center)
+        cost_center_cache.bump()
     
     return cost_center
 
@@ -421,6 +652,7 @@ def _get_or_create_spend_category(db: Session, name: Optional[str]) -> SpendCate
         db.add(spend_category)
         db.commit()
         db.refresh(spend_category)
+        spend_category_cache.bump()
     
     return spend_category
 
@@ -450,50 +682,51 @@ def _resolve_spend_categories(db: Session, names: List[str]) -> List[SpendCatego
 # ============================================
 
 
-def _cleanup_orphaned_spend_categories(db: Session, old_categories: List[SpendCategory]) -> None:
+def _cleanup_orphaned_spend_categories(db: Session, spend_category_ids: List[int]) -> None:
     """
-    Delete spend categories that are no longer used by any transactions.
-    Called after transaction update/delete.
+    Delete spend categories (from the given IDs) that are no longer used by any transactions.
+    Called after transaction update/delete. Runs as a single DELETE ... WHERE NOT EXISTS.
     """
-    for category in old_categories:
-        try:
-            # Refresh to get latest state from database
-            db.refresh(category)
-            
-            # Check if this category is still used by any transaction
-            if not category.transactions:
-                db.delete(category)
-                logger.info(f"Cleaned up orphaned spend category: {category.name} (ID: {category.id})")
-        except SQLAlchemyError as e:
-            # Category might already be deleted or session issues
-            logger.warning(f"Failed to cleanup spend category {category.id}: {e}")
-    
-    # Commit all deletions at once
+    if not spend_category_ids:
+        return
+    
+    link = transaction_spend_categories
     try:
+        result = db.execute(
+            delete(SpendCategory)
+            .where(
+                SpendCategory.id.in_(spend_category_ids),
+                ~exists().where(link.c.spend_category_id == SpendCategory.id),
+            )
+            .execution_options(synchronize_session=False)
+        )
         db.commit()
+        if result.rowcount:
+            spend_category_cache.bump()
+            logger.info(f"Cleaned up {result.rowcount} orphaned spend categories")
     except SQLAlchemyError as e:
-        logger.error(f"Failed to commit spend category cleanup: {e}")
+        logger.error(f"Failed to cleanup spend categories {spend_category_ids}: {e}")
         db.rollback()
 
 
 def _cleanup_orphaned_cost_center(db: Session, cost_center_id: int) -> None:
     """
     Delete a cost center if it's no longer used by any transactions.
-    Called after transaction update/delete.
+    Called after transaction update/delete. Runs as a single DELETE ... WHERE NOT EXISTS.
     """
     try:
-        cost_center = db.get(CostCenter, cost_center_id)
-        if not cost_center:
-            return
-        
-        # Refresh to get latest state
-        db.refresh(cost_center)
-        
-        # Check if this cost center is still used
-        if not cost_center.transactions:
-            db.delete(cost_center)
-            db.commit()
-            logger.info(f"Cleaned up orphaned cost center: {cost_center.name} (ID: {cost_center.id})")
+        result = db.execute(
+            delete(CostCenter)
+            .where(
+                CostCenter.id == cost_center_id,
+                ~exists().where(Transaction.cost_center_id == CostCenter.id),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if result.rowcount:
+            cost_center_cache.bump()
+            logger.info(f"Cleaned up orphaned cost center (ID: {cost_center_id})")
     except SQLAlchemyError as e:
         logger.error(f"Failed to cleanup cost center {cost_center_id}: {e}")
         db.rollback()
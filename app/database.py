@@ -1,10 +1,15 @@
 # app/database.py - sets up database
-from sqlalchemy import create_engine
+import logging
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker
 
 from .models import Base
 
 
+logger = logging.getLogger(__name__)
+
+
 DATABASE_URL = "sqlite:///./transactions.db"
 
 
@@ -12,5 +17,70 @@ engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+# External-content FTS5 table with the trigram tokenizer, so LIKE '%term%' searches
+# (3+ chars, case-insensitive) use the index instead of scanning every description
+_SEARCH_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5(
+        description, content='transactions', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_ai AFTER INSERT ON transactions BEGIN
+        INSERT INTO transactions_fts(rowid, description) VALUES (new.id, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_ad AFTER DELETE ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, description) VALUES ('delete', old.id, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transactions_fts_au AFTER UPDATE OF description ON transactions BEGIN
+        INSERT INTO transactions_fts(transactions_fts, rowid, description) VALUES ('delete', old.id, old.description);
+        INSERT INTO transactions_fts(rowid, description) VALUES (new.id, new.description);
+    END
+    """,
+    # Index rows that existed before the search index (or one of its triggers) was added
+    "INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')",
+]
+
+# Every object the search index needs; if any is missing, the DDL above is rerun
+_SEARCH_INDEX_OBJECTS = {"transactions_fts", "transactions_fts_ai", "transactions_fts_ad", "transactions_fts_au"}
+
+_search_index_ready = False
+
+
 def init_db():
+    global _search_index_ready
+    
     Base.metadata.create_all(bind=engine)
+    
+    # create_all skips indexes on tables that already exist, so add any new ones
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
+    _search_index_ready = _init_search_index()
+
+
+def search_index_ready() -> bool:
+    """Whether the transactions_fts search index exists (requires SQLite 3.34+ with FTS5)."""
+    return _search_index_ready
+
+
+def _init_search_index() -> bool:
+    """Create the description search index and its sync triggers if any are missing."""
+    try:
+        with engine.begin() as conn:
+            existing = set(conn.execute(text("SELECT name FROM sqlite_master")).scalars())
+            if not _SEARCH_INDEX_OBJECTS <= existing:
+                # pysqlite commits each CREATE on its own, so an earlier start (or another worker)
+                # may have created only some objects; IF NOT EXISTS makes rerunning them safe,
+                # and the rebuild re-indexes rows changed while a trigger was missing
+                for statement in _SEARCH_INDEX_DDL:
+                    conn.execute(text(statement))
+        return True
+    except OperationalError as e:
+        logger.warning(f"Search index unavailable, falling back to LIKE scans: {e}")
+        return False
@@ -1,74 +1,39 @@
 # app/loaders.py - takes parsed .csv data and loads it into DB
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
-from typing import List, Dict, Any, Optional
+from itertools import chain
+from typing import Iterable, List, Optional
 
+from .cache import account_cache, cost_center_cache, spend_category_cache
+from .crud.operations import bulk_resolve_cost_centers, bulk_resolve_spend_categories
 from .database import SessionLocal, init_db
-from .models import Transaction, CostCenter, SpendCategory
+from .models import Transaction, transaction_spend_categories
+from .parsers import ParsedTransaction
 
 
-def get_or_create_cost_center(db: Session, name: Optional[str]) -> CostCenter:
-    """
-    Get existing cost center or create if it doesn't exist.
-    If name is None or empty, returns/creates "Uncategorized".
-    """
+def _clean_cost_center_name(name: Optional[str]) -> str:
+    """Strip a cost center name. If name is None or empty, returns "Uncategorized"."""
     if not name or not name.strip():
-        name = "Uncategorized"
-    else:
-        name = name.strip()
-    
-    cost_center = db.query(CostCenter).filter(CostCenter.name == name).first()
-    
-    if not cost_center:
-        cost_center = CostCenter(name=name)
-        db.add(cost_center)
-        db.flush()  # Ensure cost center gets an ID before continuing
-    
-    return cost_center
+        return "Uncategorized"
+    return name.strip()
 
 
-def get_or_create_spend_categories(db: Session, names: List[str]) -> List[SpendCategory]:
+def _clean_spend_category_names(names: List[str]) -> List[str]:
     """
-    Get or create spend categories from a list of names.
-    If the list is empty or all names are empty, returns ["Uncategorized"].
-    Removes duplicates and empty strings.
+    Strip and deduplicate spend category names, dropping empty strings.
+    If no valid names remain, returns ["Uncategorized"].
     """
-    # Clean and deduplicate names
-    cleaned_names = []
-    seen = set()
-    
-    for name in names:
-        if name and name.strip():
-            cleaned = name.strip()
-            if cleaned not in seen:
-                cleaned_names.append(cleaned)
-                seen.add(cleaned)
-    
-    # If no valid names, default to Uncategorized
-    if not cleaned_names:
-        cleaned_names = ["Uncategorized"]
-    
-    # Get or create each category
-    categories = []
-    for name in cleaned_names:
-        category = db.query(SpendCategory).filter(SpendCategory.name == name).first()
-        
-        if not category:
-            category = SpendCategory(name=name)
-            db.add(category)
-            db.flush()  # Ensure category gets an ID
-        
-        categories.append(category)
-    
-    return categories
+    cleaned_names = list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+    return cleaned_names or ["Uncategorized"]
 
 
-def save_transactions(transactions: List[Dict[str, Any]], db_session: Optional[Session] = None):
+def save_transactions(transactions: List[ParsedTransaction], db_session: Optional[Session] = None):
     """
     Save a list of parsed transactions to the database.
     
     Args:
-        transactions: List of transaction dictionaries with keys:
+        transactions: List of parsed transactions (from parse_csv) with fields:
             - date: datetime.date
             - description: str
             - cost_center_name: str or None (cost center name)  # FIXED: was "cost_center"
@@ -82,6 +47,22 @@ def save_transactions(transactions: List[Dict[str, Any]], db_session: Optional[S
     Raises:
         Exception: If database operations fail (transaction will be rolled back)
     """
+    save_transaction_batches([transactions], db_session)
+
+
+def save_transaction_batches(batches: Iterable[List[ParsedTransaction]], db_session: Optional[Session] = None) -> int:
+    """
+    Save batches of parsed transactions (e.g. from parsers.iter_csv) in one database transaction.
+    
+    Each batch is inserted as it arrives, so only one batch is held in memory at a time.
+    If the iterator raises (e.g. a later row fails validation), everything is rolled back.
+    
+    Returns:
+        Number of transactions saved
+    
+    Raises:
+        Exception: If parsing or database operations fail (transaction will be rolled back)
+    """
     own_session = db_session is None
     
     if own_session:
@@ -89,30 +70,21 @@ def save_transactions(transactions: List[Dict[str, Any]], db_session: Optional[S
         db_session = SessionLocal()
     
     try:
-        for t in transactions:
-            # Get or create cost center
-            cost_center = get_or_create_cost_center(db_session, t.get("cost_center_name"))
-            
-            # Get or create spend categories
-            spend_category_names = t.get("spend_category_names", [])
-            spend_categories = get_or_create_spend_categories(db_session, spend_category_names)
-            
-            # Create transaction
-            db_transaction = Transaction(
-                date = t["date"],
-                description = t["description"],
-                cost_center = cost_center,
-                spend_categories = spend_categories,
-                amount = t["amount"],
-                account = t["account"],
-                notes = t["notes"],
-            )
-            
-            db_session.add(db_transaction)
+        count = 0
+        for transactions in batches:
+            _insert_transactions(db_session, transactions)
+            count += len(transactions)
         
         db_session.commit()
         
-    except Exception as e:
+        # New cost centers / spend categories / accounts may have been created
+        cost_center_cache.bump()
+        spend_category_cache.bump()
+        account_cache.bump()
+        
+        return count
+        
+    except Exception:
         db_session.rollback()
         raise
     
@@ -120,3 +92,47 @@ def save_transactions(transactions: List[Dict[str, Any]], db_session: Optional[S
         # Only close if session is created
         if own_session:
             db_session.close()
+
+
+def _insert_transactions(db_session: Session, transactions: List[ParsedTransaction]) -> None:
+    """Insert one batch of transactions and their spend category links. Does not commit."""
+    # Resolve all cost centers / spend categories up front with bulk queries
+    cost_center_names = [_clean_cost_center_name(t.cost_center_name) for t in transactions]
+    spend_category_names = [_clean_spend_category_names(t.spend_category_names) for t in transactions]
+    
+    cost_center_ids = bulk_resolve_cost_centers(db_session, cost_center_names)
+    spend_category_ids = bulk_resolve_spend_categories(db_session, chain.from_iterable(spend_category_names))
+    
+    # Insert all transactions in one executemany where supported, keeping IDs in input order
+    rows = [
+        {
+            "date": t.date,
+            "description": t.description,
+            "cost_center_id": cost_center_ids[cost_center_name],
+            "amount": t.amount,
+            "account": t.account,
+            "notes": t.notes,
+        }
+        for t, cost_center_name in zip(transactions, cost_center_names)
+    ]
+    transaction_ids = []
+    if rows and db_session.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        transaction_ids = db_session.scalars(
+            insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True),
+            rows,
+        ).all()
+    elif rows:
+        # SQLite < 3.35 has no RETURNING: insert row by row, reading each new ID
+        transaction_ids = [
+            db_session.execute(insert(Transaction).values(row)).inserted_primary_key[0]
+            for row in rows
+        ]
+    
+    # Link spend categories in a second executemany
+    links = [
+        {"transaction_id": transaction_id, "spend_category_id": spend_category_ids[name]}
+        for transaction_id, names in zip(transaction_ids, spend_category_names)
+        for name in names
+    ]
+    if links:
+        db_session.execute(transaction_spend_categories.insert(), links)
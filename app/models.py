@@ -1,5 +1,5 @@
 # app/models.py - sets up SQLite database tables using SQLAlchemy ORM
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Table, Index
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Table, Index, column, table
 from sqlalchemy.orm import declarative_base, relationship
 
 
@@ -98,9 +98,11 @@ class Transaction(Base):
         back_populates="transactions"
     )
 
+    # (date, id) ordering is served by the index on date: SQLite appends the rowid (id) to every index
     __table_args__ = (
         Index('idx_account_date', 'account', 'date'),
-        Index('idx_cost_center', 'cost_center_id'),
+        Index('idx_cost_center_date', 'cost_center_id', 'date'),
+        Index('idx_amount', 'amount'),
     )
 
     def __repr__(self):
@@ -108,3 +110,17 @@ class Transaction(Base):
             f"<Transaction(id={self.id}, date={self.date}, amount={self.amount}, "
             f"account={self.account}, cost_center_id={self.cost_center_id})>"
         )
+
+
+# ============================================
+# Full-Text Search Index
+# ============================================
+
+
+# FTS5 trigram index over transactions.description, kept in sync by triggers.
+# Created in database.init_db (not by create_all), so it's a lightweight table() construct.
+transactions_fts = table(
+    'transactions_fts',
+    column('rowid', Integer),
+    column('description', String),
+)
@@ -1,51 +1,71 @@
 # app/parsers.py - parses .csv downloads from Discover CC and Schwab Checking Account
 import csv
 import re
-from datetime import datetime
-from typing import Dict, List
-from pydantic import ValidationError
+from datetime import date, datetime
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from pydantic import TypeAdapter, ValidationError
 from app import schemas
 
 
+class ParsedTransaction(NamedTuple):
+    """One parsed CSV row, with the fields of schemas.TransactionCreate."""
+    date: date
+    description: str
+    amount: float
+    account: str
+    cost_center_name: Optional[str]
+    spend_category_names: List[str]
+    notes: Optional[str]
+
+
+# Every character str.isspace() (and regex \s) treats as whitespace
+_WHITESPACE = "\t\n\v\f\r\x1c\x1d\x1e\x1f \x85\xa0\u1680" + "".join(map(chr, range(0x2000, 0x200b))) + "\u2028\u2029\u202f\u205f\u3000"
+
+# Deletes dollar signs, commas and whitespace from currency strings
+_CURRENCY_TRANS = str.maketrans("", "", "$," + _WHITESPACE)
+
+# Deletes whitespace and the BOM characters that appear at the start of some CSV files
+_HEADER_TRANS = str.maketrans("", "", "\ufeff\ufffe" + _WHITESPACE)
+
+# Splits a CashCanvas "Spend Categories" cell on commas and the whitespace around them
+_SPEND_SPLIT_RE = re.compile(r"\s*,\s*")
+
+# Only strings of this length can lowercase to "uncategorized", so check it before lower()
+_UNCATEGORIZED_LEN = len("uncategorized")
+
+# Read CSVs in 1 MiB chunks (the default buffer is 8 KiB)
+_READ_BUFFER_SIZE = 1 << 20
+
+# Transactions per batch yielded by the iter_*_csv streaming parsers
+CSV_BATCH_SIZE = 1000
+
+# Row errors listed in the upload error, and the count at which a loader stops reading
+_MAX_REPORTED_ERRORS = 20
+_ABORT_AT = 100
+
+# Validates a whole file's transactions in one pass through pydantic-core
+_TXN_LIST_ADAPTER = TypeAdapter(List[schemas.TransactionCreate])
+
+
 def clean_header(header):
     """Clean header string by removing all whitespace, newlines, BOM, and special characters."""
     if not header:
         return ""
     
-    # Remove BOM character that appears at start of some CSV files
-    cleaned = header.replace('\ufeff', '').replace('\ufffe', '')
-    
-    # Remove all types of whitespace including newlines, carriage returns, tabs, etc.
-    return ''.join(cleaned.split()).strip()
-
-
-def validate_headers(expected_headers, actual_headers, source_name):
-    """Validate that all expected headers are present in the CSV."""
-    normalized_actual = {clean_header(h): h for h in actual_headers if h}
-    normalized_expected = {clean_header(h): h for h in expected_headers}
-    
-    # Check if all expected headers exist (in normalized form)
-    missing = [expected for norm_exp, expected in normalized_expected.items() 
-               if norm_exp not in normalized_actual]
-    
-    if missing:
-        raise ValueError(
-            f"CSV file does not look like a {source_name} export. "
-            f"Missing columns: {missing}. "
-            f"Found columns: {list(actual_headers)}"
-        )
+    # Remove BOM characters and all types of whitespace (newlines, tabs, etc.) in one pass
+    return header.translate(_HEADER_TRANS)
 
 
 def clean_currency_string(value, row_num=None):
     """Remove currency symbols, commas, and whitespace from monetary values."""
-    if not value or value.strip() == "":
+    if not value or value.isspace():
         error_msg = f"Empty or invalid currency value: '{value}'"
         if row_num:
             error_msg = f"Row {row_num}: {error_msg}"
         raise ValueError(error_msg)
     
-    # Remove dollar signs, commas, and whitespace
-    cleaned = re.sub(r'[$,\s]', '', str(value).strip())
+    # Remove dollar signs, commas, and whitespace (csv always gives us str, so skip the str() call)
+    cleaned = (value if type(value) is str else str(value)).translate(_CURRENCY_TRANS)
     
     if not cleaned:
         error_msg = f"Empty or invalid currency value: '{value}'"
@@ -62,240 +82,383 @@ def clean_currency_string(value, row_num=None):
         raise ValueError(error_msg)
 
 
-def _parse_headers(reader, expected_headers_map: Dict[str, str], institution_name: str) -> Dict[str, str]:
+def _fast_mdy(value: str) -> date:
+    """Parse a MM/DD/YYYY date by slicing, falling back to strptime for other shapes (e.g. 1/5/2024)."""
+    if len(value) == 10 and value[2] == "/" and value[5] == "/" and value.isascii():
+        month, day, year = value[0:2], value[3:5], value[6:10]
+        if (month + day + year).isdigit():
+            try:
+                return date(int(year), int(month), int(day))
+            except ValueError:
+                pass  # Out-of-range values get strptime's error message
+    return datetime.strptime(value, "%m/%d/%Y").date()
+
+
+def _fast_ymd(value: str) -> date:
+    """Parse a YYYY-MM-DD date by slicing, falling back to strptime for other shapes."""
+    if len(value) == 10 and value[4] == "-" and value[7] == "-" and value.isascii():
+        year, month, day = value[0:4], value[5:7], value[8:10]
+        if (year + month + day).isdigit():
+            try:
+                return date(int(year), int(month), int(day))
+            except ValueError:
+                pass
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _parse_cashcanvas_date(value: str) -> date:
+    """Parse a CashCanvas export date, either YYYY-MM-DD or MM/DD/YYYY."""
+    # Pick the format from the string's shape: only ISO dates have a dash at
+    # index 4, so MM/DD/YYYY rows skip the failed ISO attempt
+    if value[4:5] == "-":
+        try:
+            return _fast_ymd(value)
+        except ValueError:
+            pass  # Keep the MM/DD/YYYY error message for malformed dates
+    return _fast_mdy(value)
+
+
+def _parse_headers(header_row: List[str], expected_headers_map: Dict[str, str], institution_name: str) -> Dict[str, int]:
     """
     Parse and validate CSV headers.
     
     Args:
-        reader: CSV DictReader
+        header_row: First row of the CSV
         expected_headers_map: Dict mapping clean names to display names
             e.g., {"date": "Trans. Date", "description": "Description"}
         institution_name: Name for error messages
     
     Returns:
-        Dict mapping clean names to actual header names in CSV
+        Dict mapping clean names to column positions in CSV
     """
-    if not reader.fieldnames:
+    if not header_row:
         raise ValueError("CSV file appears to be empty")
     
-    original_headers = [h.strip() for h in reader.fieldnames]
-    header_mapping = {clean_header(h): h for h in original_headers}
+    # clean_header already drops surrounding whitespace, so no separate strip pass is needed
+    header_positions = {clean_header(h): i for i, h in enumerate(header_row)}
     
-    validate_headers(
-        list(expected_headers_map.values()),
-        original_headers,
-        institution_name
-    )
+    # Match each expected header in its normalized form, collecting any that are missing
+    positions = {}
+    missing = []
+    for clean_key, display_name in expected_headers_map.items():
+        position = header_positions.get(clean_header(display_name))
+        if position is None:
+            missing.append(display_name)
+        else:
+            positions[clean_key] = position
+    
+    if missing:
+        raise ValueError(
+            f"CSV file does not look like a {institution_name} export. "
+            f"Missing columns: {missing}. "
+            f"Found columns: {[h.strip() for h in header_row]}"
+        )
     
-    return {
-        clean_key: header_mapping[clean_header(display_name)]
-        for clean_key, display_name in expected_headers_map.items()
-    }
+    return positions
 
 
-def _validate_transaction_data(txn_data: dict, row_num: int) -> None:
+def _validate_transactions(transactions: List[ParsedTransaction], row_nums: List[int]) -> List[Tuple[int, str]]:
     """
-    Validate transaction data with Pydantic schema.
+    Validate all parsed transactions with a single Pydantic call.
     
     Args:
-        txn_data: Transaction dictionary
-        row_num: Row number for error messages
+        transactions: Parsed transactions
+        row_nums: CSV row number of each transaction, for error messages
     
-    Raises:
-        ValueError: If validation fails
+    Returns:
+        (row_num, message) for each row that failed validation
     """
     try:
-        schemas.TransactionCreate(**txn_data)
+        _TXN_LIST_ADAPTER.validate_python(transactions, from_attributes=True)
     except ValidationError as e:
-        errors = []
+        # loc is (list index, field, ...); group messages by row
+        row_errors = {}
         for error in e.errors():
-            field = error['loc'][0] if error['loc'] else 'unknown'
-            msg = error['msg']
-            errors.append(f"{field}: {msg}")
-        raise ValueError(f"Row {row_num} validation failed: {'; '.join(errors)}")
+            index, *field = error['loc']
+            row_errors.setdefault(index, []).append(f"{field[0] if field else 'unknown'}: {error['msg']}")
+        return [
+            (row_nums[index], f"Row {row_nums[index]} validation failed: {'; '.join(messages)}")
+            for index, messages in row_errors.items()
+        ]
+    return []
+
+
+def _raise_if_errors(errors: List[Tuple[int, str]], stopped_early: bool = False) -> None:
+    """Raise a single ValueError listing the first row errors in row order."""
+    if errors:
+        errors.sort()
+        summary = f"stopped after {len(errors)} errors" if stopped_early else f"{len(errors)} error(s)"
+        raise ValueError(
+            f"CSV validation failed ({summary}):\n" + 
+            "\n".join(f"Row {row_num}: {message}" for row_num, message in errors[:_MAX_REPORTED_ERRORS])
+        )
 
 
-def load_discover_csv(file_path: str):
+class _StoppedEarly(Exception):
+    """Raised by the row parsers when they stop reading after _ABORT_AT errors."""
+
+
+def _iter_validated_batches(
+    parse_rows: Callable[[str, List[Tuple[int, str]]], Iterator[Tuple[int, ParsedTransaction]]],
+    file_path: str,
+    batch_size: int,
+) -> Iterator[List[ParsedTransaction]]:
     """
-    Parse Discover credit card CSV export.
+    Validate parsed rows in batches of batch_size, yielding each batch while the file is error-free.
     
-    Expected columns:
-    - Trans. Date: Transaction date (MM/DD/YYYY)
-    - Description: Transaction description
-    - Amount: Transaction amount (positive = expense, negative = credit)
-    - Category: Discover's category (maps to cost_center)
+    After the first error nothing more is yielded, but the rest of the file is still read
+    (until the row parser gives up after _ABORT_AT errors) so the ValueError raised at
+    the end lists every problem.
+    Callers that save batches as they arrive must roll back when it is raised.
     """
-    transactions = []
     errors = []
+    batch = []
+    row_nums = []
     
-    with open(file_path, newline="", encoding="utf-8-sig") as csvfile:
+    # Bind the per-row appends once (and again after each batch reset)
+    append_transaction = batch.append
+    append_row_num = row_nums.append
+    
+    stopped_early = False
+    try:
+        for row_num, txn in parse_rows(file_path, errors):
+            append_transaction(txn)
+            append_row_num(row_num)
+            
+            if len(batch) >= batch_size:
+                # Validate with Pydantic
+                errors.extend(_validate_transactions(batch, row_nums))
+                if not errors:
+                    yield batch
+                batch = []
+                row_nums = []
+                append_transaction = batch.append
+                append_row_num = row_nums.append
+    except _StoppedEarly:
+        stopped_early = True
+    
+    # Validate the final partial batch (pointless if the file was already rejected)
+    if batch and not stopped_early:
+        errors.extend(_validate_transactions(batch, row_nums))
+        if not errors:
+            yield batch
+    
+    _raise_if_errors(errors, stopped_early)
+
+
+def _parse_discover_rows(file_path: str, errors: List[Tuple[int, str]]) -> Iterator[Tuple[int, ParsedTransaction]]:
+    """Yield (row_num, transaction) for each parsable row of a Discover export, recording row errors in errors."""
+    with open(file_path, newline="", encoding="utf-8-sig", buffering=_READ_BUFFER_SIZE) as csvfile:
         # Read the CSV with original headers (utf-8-sig automatically removes BOM)
-        reader = csv.DictReader(csvfile)
+        reader = csv.reader(csvfile)
         
-        headers = _parse_headers(reader, {
+        headers = _parse_headers(next(reader, None), {
             "date": "Trans. Date",
             "description": "Description",
             "amount": "Amount",
             "category": "Category"
         }, "Discover")
         
-        for row_num, row in enumerate(reader, start=2):
+        # Resolve column positions once instead of per row
+        date_idx = headers["date"]
+        desc_idx = headers["description"]
+        amount_idx = headers["amount"]
+        category_idx = headers["category"]
+        
+        # Files repeat the same few hundred dates, so parse each distinct string once
+        date_cache: Dict[str, date] = {}
+        
+        # Rows shorter than this are missing a column we read
+        min_width = max(headers.values()) + 1
+        
+        # Skip blank lines (csv.reader yields them as empty rows). Failed checks record
+        # the error and move on to the next row; only parsing is wrapped in try/except
+        for row_num, row in enumerate(filter(None, reader), start=2):
+            if len(errors) >= _ABORT_AT:
+                raise _StoppedEarly
+            
+            if len(row) < min_width:
+                errors.append((row_num, f"Expected at least {min_width} columns, found {len(row)}"))
+                continue
+            
+            # Validate and parse date
+            date_str = row[date_idx].strip()
+            if not date_str:
+                errors.append((row_num, "Date is empty"))
+                continue
+            date_obj = date_cache.get(date_str)
+            if date_obj is None:
+                try:
+                    date_obj = _fast_mdy(date_str)
+                except ValueError as e:
+                    errors.append((row_num, str(e)))
+                    continue
+                date_cache[date_str] = date_obj
+            
+            # Validate description
+            description = row[desc_idx].strip()
+            if not description:
+                errors.append((row_num, "Description is empty"))
+                continue
+            
+            # Validate and parse amount
+            raw_amount_str = row[amount_idx].strip()
+            if not raw_amount_str:
+                errors.append((row_num, "Amount is empty"))
+                continue
             try:
-                # Validate and parse date
-                date_str = row[headers["date"]].strip()
-                if not date_str:
-                    raise ValueError("Date is empty")
-                date_obj = datetime.strptime(date_str, "%m/%d/%Y").date()
-                
-                # Validate description
-                description = row[headers["description"]].strip()
-                if not description:
-                    raise ValueError("Description is empty")
-                
-                # Validate and parse amount
-                raw_amount_str = row[headers["amount"]].strip()
-                if not raw_amount_str:
-                    raise ValueError("Amount is empty")
                 raw_amount = clean_currency_string(raw_amount_str, row_num)
-                
-                # Get cost center
-                cost_center = row[headers["category"]].strip() if row[headers["category"]].strip() else "Uncategorized"
-                
-                # For Discover: negative amounts in CSV = credits (positive in ledger)
-                #               positive amounts in CSV = expenses (negative in ledger)
-                amount = -raw_amount
-                
-                txn_data = {
-                    "date": date_obj,
-                    "description": description,
-                    "cost_center_name": cost_center,
-                    "spend_category_names": [],
-                    "amount": amount,
-                    "account": "Discover",
-                    "notes": None,
-                }
-                
-                # Validate with Pydantic
-                _validate_transaction_data(txn_data, row_num)
-                
-                transactions.append(txn_data)
-                
-            except Exception as e:
-                errors.append(f"Row {row_num}: {str(e)}")
-    
-    if errors:
-        raise ValueError(
-            f"CSV validation failed ({len(errors)} error(s)):\n" + 
-            "\n".join(errors[:20])  # Limit to first 20 errors
-        )
-    
-    return transactions
+            except ValueError as e:
+                errors.append((row_num, str(e)))
+                continue
+            
+            # Get cost center
+            cost_center = row[category_idx].strip() or "Uncategorized"
+            
+            # For Discover: negative amounts in CSV = credits (positive in ledger)
+            #               positive amounts in CSV = expenses (negative in ledger)
+            amount = -raw_amount
+            
+            yield row_num, ParsedTransaction(
+                date=date_obj,
+                description=description,
+                amount=amount,
+                account="Discover",
+                cost_center_name=cost_center,
+                spend_category_names=[],
+                notes=None,
+            )
+
+
+def iter_discover_csv(file_path: str, batch_size: int = CSV_BATCH_SIZE) -> Iterator[List[ParsedTransaction]]:
+    """Stream a Discover export as validated batches (see load_discover_csv and _iter_validated_batches)."""
+    return _iter_validated_batches(_parse_discover_rows, file_path, batch_size)
 
 
-def load_schwab_csv(file_path: str):
+def load_discover_csv(file_path: str) -> List[ParsedTransaction]:
     """
-    Parse Schwab checking account CSV export.
+    Parse Discover credit card CSV export.
     
     Expected columns:
-    - Date: Transaction date (MM/DD/YYYY)
-    - Status: Transaction status (ignored)
-    - Type: Transaction type (ignored)
-    - CheckNumber: Check number if applicable (ignored)
+    - Trans. Date: Transaction date (MM/DD/YYYY)
     - Description: Transaction description
-    - Withdrawal: Withdrawal amount (expenses - will be negative in DB)
-    - Deposit: Deposit amount (income - will be positive in DB)
-    - RunningBalance: Running balance (ignored)
-    
-    Note: Schwab doesn't provide categories, so cost_center defaults to "Uncategorized".
+    - Amount: Transaction amount (positive = expense, negative = credit)
+    - Category: Discover's category (maps to cost_center)
     """
-    transactions = []
-    errors = []
-    
-    with open(file_path, newline="", encoding="utf-8-sig") as csvfile:
-        reader = csv.DictReader(csvfile)
+    return [txn for batch in iter_discover_csv(file_path) for txn in batch]
+
+
+def _parse_schwab_rows(file_path: str, errors: List[Tuple[int, str]]) -> Iterator[Tuple[int, ParsedTransaction]]:
+    """Yield (row_num, transaction) for each parsable row of a Schwab checking export, recording row errors in errors."""
+    with open(file_path, newline="", encoding="utf-8-sig", buffering=_READ_BUFFER_SIZE) as csvfile:
+        reader = csv.reader(csvfile)
         
-        headers = _parse_headers(reader, {
+        headers = _parse_headers(next(reader, None), {
             "date": "Date",
             "description": "Description",
             "withdrawal": "Withdrawal",
             "deposit": "Deposit"
         }, "Schwab Checking")
         
-        for row_num, row in enumerate(reader, start=2):
+        # Resolve column positions once instead of per row
+        date_idx = headers["date"]
+        desc_idx = headers["description"]
+        withdrawal_idx = headers["withdrawal"]
+        deposit_idx = headers["deposit"]
+        
+        # Files repeat the same few hundred dates, so parse each distinct string once
+        date_cache: Dict[str, date] = {}
+        
+        # Rows shorter than this are missing a column we read
+        min_width = max(headers.values()) + 1
+        
+        # Skip blank lines (csv.reader yields them as empty rows). Failed checks record
+        # the error and move on to the next row; only parsing is wrapped in try/except
+        for row_num, row in enumerate(filter(None, reader), start=2):
+            if len(errors) >= _ABORT_AT:
+                raise _StoppedEarly
+            
+            if len(row) < min_width:
+                errors.append((row_num, f"Expected at least {min_width} columns, found {len(row)}"))
+                continue
+            
+            # Validate and parse date
+            date_str = row[date_idx].strip()
+            if not date_str:
+                errors.append((row_num, "Date is empty"))
+                continue
+            date_obj = date_cache.get(date_str)
+            if date_obj is None:
+                try:
+                    date_obj = _fast_mdy(date_str)
+                except ValueError as e:
+                    errors.append((row_num, str(e)))
+                    continue
+                date_cache[date_str] = date_obj
+            
+            # Validate description
+            description = row[desc_idx].strip()
+            if not description:
+                errors.append((row_num, "Description is empty"))
+                continue
+            
+            # Process amounts
+            withdrawal_str = row[withdrawal_idx].strip()
+            deposit_str = row[deposit_idx].strip()
+            
+            # Determine amount
             try:
-                # Validate and parse date
-                date_str = row[headers["date"]].strip()
-                if not date_str:
-                    raise ValueError("Date is empty")
-                date_obj = datetime.strptime(date_str, "%m/%d/%Y").date()
-                
-                # Validate description
-                description = row[headers["description"]].strip()
-                if not description:
-                    raise ValueError("Description is empty")
-                
-                # Process amounts
-                withdrawal_str = row.get(headers["withdrawal"], "").strip()
-                deposit_str = row.get(headers["deposit"], "").strip()
-                
-                # Determine amount
                 if withdrawal_str and withdrawal_str != "":
                     amount = -clean_currency_string(withdrawal_str, row_num)
                 elif deposit_str and deposit_str != "":
                     amount = clean_currency_string(deposit_str, row_num)
                 else:
                     raise ValueError("Both Withdrawal and Deposit are empty")
-                
-                txn_data = {
-                    "date": date_obj,
-                    "description": description,
-                    "amount": amount,
-                    "account": "Schwab Checking",
-                    "cost_center_name": None,
-                    "spend_category_names": [],
-                    "notes": None,
-                }
-                
-                # Validate with Pydantic
-                _validate_transaction_data(txn_data, row_num)
-                
-                transactions.append(txn_data)
-                
-            except Exception as e:
-                errors.append(f"Row {row_num}: {str(e)}")
-    
-    if errors:
-        raise ValueError(
-            f"CSV validation failed ({len(errors)} error(s)):\n" + 
-            "\n".join(errors[:20])
-        )
-    
-    return transactions
+            except ValueError as e:
+                errors.append((row_num, str(e)))
+                continue
+            
+            yield row_num, ParsedTransaction(
+                date=date_obj,
+                description=description,
+                amount=amount,
+                account="Schwab Checking",
+                cost_center_name=None,
+                spend_category_names=[],
+                notes=None,
+            )
+
+
+def iter_schwab_csv(file_path: str, batch_size: int = CSV_BATCH_SIZE) -> Iterator[List[ParsedTransaction]]:
+    """Stream a Schwab checking export as validated batches (see load_schwab_csv and _iter_validated_batches)."""
+    return _iter_validated_batches(_parse_schwab_rows, file_path, batch_size)
 
 
-def load_cashcanvas_csv(file_path: str):
+def load_schwab_csv(file_path: str) -> List[ParsedTransaction]:
     """
-    Parse custom CashCanvas export CSV format from this app.
+    Parse Schwab checking account CSV export.
     
     Expected columns:
-    - Date: Transaction date (YYYY-MM-DD or MM/DD/YYYY)
+    - Date: Transaction date (MM/DD/YYYY)
+    - Status: Transaction status (ignored)
+    - Type: Transaction type (ignored)
+    - CheckNumber: Check number if applicable (ignored)
     - Description: Transaction description
-    - Amount: Transaction amount (negative = expense, positive = income)
-    - Account: Account name
-    - Cost Center: Cost center name
-    - Spend Categories: Comma-separated list of spend category names
-    - Notes: Optional notes field
+    - Withdrawal: Withdrawal amount (expenses - will be negative in DB)
+    - Deposit: Deposit amount (income - will be positive in DB)
+    - RunningBalance: Running balance (ignored)
     
-    This format is used for exporting and re-importing transactions after bulk editing.
-    Spend categories should be comma-separated (e.g., "Restaurant, Night Life").
+    Note: Schwab doesn't provide categories, so cost_center defaults to "Uncategorized".
     """
-    transactions = []
-    errors = []
-    
-    with open(file_path, newline="", encoding="utf-8-sig") as csvfile:
-        reader = csv.DictReader(csvfile)
+    return [txn for batch in iter_schwab_csv(file_path) for txn in batch]
+
+
+def _parse_cashcanvas_rows(file_path: str, errors: List[Tuple[int, str]]) -> Iterator[Tuple[int, ParsedTransaction]]:
+    """Yield (row_num, transaction) for each parsable row of a CashCanvas export, recording row errors in errors."""
+    with open(file_path, newline="", encoding="utf-8-sig", buffering=_READ_BUFFER_SIZE) as csvfile:
+        reader = csv.reader(csvfile)
         
-        headers = _parse_headers(reader, {
+        headers = _parse_headers(next(reader, None), {
             "date": "Date",
             "description": "Description",
             "amount": "Amount",
@@ -305,111 +468,171 @@ def load_cashcanvas_csv(file_path: str):
             "notes": "Notes",
         }, "CashCanvas Export")
         
-        for row_num, row in enumerate(reader, start=2):
-            try:
-                # Validate and parse date
-                date_str = row[headers["date"]].strip()
-                if not date_str:
-                    raise ValueError("Date is empty")
-                
+        # Resolve column positions once instead of per row
+        date_idx = headers["date"]
+        desc_idx = headers["description"]
+        amount_idx = headers["amount"]
+        account_idx = headers["account"]
+        cost_center_idx = headers["cost_center"]
+        spend_categories_idx = headers["spend_categories"]
+        notes_idx = headers["notes"]
+        
+        # Files repeat the same few hundred dates, so parse each distinct string once
+        date_cache: Dict[str, date] = {}
+        
+        # Rows shorter than this are missing a column we read
+        min_width = max(headers.values()) + 1
+        
+        # Skip blank lines (csv.reader yields them as empty rows). Failed checks record
+        # the error and move on to the next row; only parsing is wrapped in try/except
+        for row_num, row in enumerate(filter(None, reader), start=2):
+            if len(errors) >= _ABORT_AT:
+                raise _StoppedEarly
+            
+            if len(row) < min_width:
+                errors.append((row_num, f"Expected at least {min_width} columns, found {len(row)}"))
+                continue
+            
+            # Validate and parse date
+            date_str = row[date_idx].strip()
+            if not date_str:
+                errors.append((row_num, "Date is empty"))
+                continue
+            date_obj = date_cache.get(date_str)
+            if date_obj is None:
                 try:
-                    # Try ISO format first (YYYY-MM-DD)
-                    date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-                except ValueError:
-                    # Fall back to MM/DD/YYYY
-                    date_obj = datetime.strptime(date_str, "%m/%d/%Y").date()
-                
-                # Validate description
-                description = row[headers["description"]].strip()
-                if not description:
-                    raise ValueError("Description is empty")
-                
-                # Validate and parse amount
-                amount_str = row[headers["amount"]].strip()
-                if not amount_str:
-                    raise ValueError("Amount is empty")
+                    date_obj = _parse_cashcanvas_date(date_str)
+                except ValueError as e:
+                    errors.append((row_num, str(e)))
+                    continue
+                date_cache[date_str] = date_obj
+            
+            # Validate description
+            description = row[desc_idx].strip()
+            if not description:
+                errors.append((row_num, "Description is empty"))
+                continue
+            
+            # Validate and parse amount
+            amount_str = row[amount_idx].strip()
+            if not amount_str:
+                errors.append((row_num, "Amount is empty"))
+                continue
+            try:
                 amount = clean_currency_string(amount_str, row_num)
-                
-                # Validate account
-                account = row[headers["account"]].strip()
-                if not account:
-                    raise ValueError("Account is empty")
-                
-                # Parse cost center
-                cost_center = row[headers["cost_center"]].strip() if row[headers["cost_center"]].strip() else None
-                if cost_center and cost_center.lower() == "uncategorized":
-                    cost_center = None
-                
-                # Parse spend categories
-                spend_categories_str = row[headers["spend_categories"]].strip()
-                spend_categories = []
-                
-                if spend_categories_str and spend_categories_str.lower() != "uncategorized":
-                    # Split by comma and clean each category
-                    raw_categories = spend_categories_str.split(',')
-                    for cat in raw_categories:
-                        # Strip leading/trailing whitespace but preserve internal spacing
-                        cleaned_cat = cat.strip()
-                        if cleaned_cat:
-                            spend_categories.append(cleaned_cat)
-                
-                # Parse notes
-                notes = None
-                if headers["notes"] in row:
-                    notes_str = row[headers["notes"]].strip()
-                    notes = notes_str if notes_str else None
-                
-                txn_data = {
-                    "date": date_obj,
-                    "description": description,
-                    "amount": amount,
-                    "account": account,
-                    "cost_center_name": cost_center,
-                    "spend_category_names": spend_categories,
-                    "notes": notes,
-                }
-                
-                # Validate with Pydantic
-                _validate_transaction_data(txn_data, row_num)
-                
-                transactions.append(txn_data)
-                
-            except Exception as e:
-                errors.append(f"Row {row_num}: {str(e)}")
+            except ValueError as e:
+                errors.append((row_num, str(e)))
+                continue
+            
+            # Validate account
+            account = row[account_idx].strip()
+            if not account:
+                errors.append((row_num, "Account is empty"))
+                continue
+            
+            # Parse cost center
+            cost_center = row[cost_center_idx].strip()
+            if not cost_center or (len(cost_center) == _UNCATEGORIZED_LEN and cost_center.lower() == "uncategorized"):
+                cost_center = None
+            
+            # Parse spend categories
+            spend_categories_str = row[spend_categories_idx].strip()
+            spend_categories = []
+            
+            if spend_categories_str and not (
+                len(spend_categories_str) == _UNCATEGORIZED_LEN and spend_categories_str.lower() == "uncategorized"
+            ):
+                # Split by comma, stripping whitespace around each category but preserving
+                # internal spacing, and drop empty entries
+                spend_categories = [cat for cat in _SPEND_SPLIT_RE.split(spend_categories_str) if cat]
+            
+            # Parse notes
+            notes = row[notes_idx].strip() or None
+            
+            yield row_num, ParsedTransaction(
+                date=date_obj,
+                description=description,
+                amount=amount,
+                account=account,
+                cost_center_name=cost_center,
+                spend_category_names=spend_categories,
+                notes=notes,
+            )
+
+
+def iter_cashcanvas_csv(file_path: str, batch_size: int = CSV_BATCH_SIZE) -> Iterator[List[ParsedTransaction]]:
+    """Stream a CashCanvas export as validated batches (see load_cashcanvas_csv and _iter_validated_batches)."""
+    return _iter_validated_batches(_parse_cashcanvas_rows, file_path, batch_size)
+
+
+def load_cashcanvas_csv(file_path: str) -> List[ParsedTransaction]:
+    """
+    Parse custom CashCanvas export CSV format from this app.
     
-    if errors:
-        raise ValueError(
-            f"CSV validation failed ({len(errors)} error(s)):\n" + 
-            "\n".join(errors[:20])
-        )
+    Expected columns:
+    - Date: Transaction date (YYYY-MM-DD or MM/DD/YYYY)
+    - Description: Transaction description
+    - Amount: Transaction amount (negative = expense, positive = income)
+    - Account: Account name
+    - Cost Center: Cost center name
+    - Spend Categories: Comma-separated list of spend category names
+    - Notes: Optional notes field
     
-    return transactions
+    This format is used for exporting and re-importing transactions after bulk editing.
+    Spend categories should be comma-separated (e.g., "Restaurant, Night Life").
+    """
+    return [txn for batch in iter_cashcanvas_csv(file_path) for txn in batch]
+
+
+# Streaming parser for each (lowercased) institution name
+_DISPATCH = {
+    "discover": iter_discover_csv,
+    "schwab": iter_schwab_csv,
+    "schwab checking": iter_schwab_csv,
+    "cashcanvas": iter_cashcanvas_csv,
+}
 
 
-def parse_csv(file_path: str, institution: str):
+def iter_csv(file_path: str, institution: str, batch_size: int = CSV_BATCH_SIZE) -> Iterator[List[ParsedTransaction]]:
     """
-    Route to the correct parser based on institution name.
+    Route to the correct streaming parser based on institution name.
     
     Args:
         file_path: Path to the CSV file
         institution: Institution name (e.g., 'discover', 'schwab', 'cashcanvas')
+        batch_size: Transactions per yielded batch
     
     Returns:
-        List of validated transaction dictionaries
+        Iterator of validated ParsedTransaction batches
     
     Raises:
-        ValueError: If institution is unknown or CSV validation fails
+        ValueError: If institution is unknown (immediately) or CSV validation fails
+            (while iterating, after any earlier batches have been yielded)
     """
     institution = institution.lower().strip()
     
-    if institution == "discover":
-        return load_discover_csv(file_path)
-    elif institution in ["schwab", "schwab checking"]:
-        return load_schwab_csv(file_path)
-    elif institution == "cashcanvas":
-        return load_cashcanvas_csv(file_path)
-    else:
+    iter_institution_csv = _DISPATCH.get(institution)
+    if iter_institution_csv is None:
         raise ValueError(
             f"Unknown institution: '{institution}'. "
             f"Supported institutions: 'discover', 'schwab', 'cashcanvas'"
         )
+    
+    return iter_institution_csv(file_path, batch_size)
+
+
+def parse_csv(file_path: str, institution: str) -> List[ParsedTransaction]:
+    """
+    Parse a whole CSV based on institution name.
+    
+    Args:
+        file_path: Path to the CSV file
+        institution: Institution name (e.g., 'discover', 'schwab', 'cashcanvas')
+    
+    Returns:
+        List of validated ParsedTransaction rows
+    
+    Raises:
+        ValueError: If institution is unknown or CSV validation fails
+    """
+    return [txn for batch in iter_csv(file_path, institution) for txn in batch]
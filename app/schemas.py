@@ -5,13 +5,19 @@ import datetime
 from typing import Optional, List
 
 
+# Allowed characters for cost center / spend category names. Kept as strings: pydantic
+# validates a compiled re.Pattern with the Python regex engine instead of its default Rust one
+_COST_CENTER_NAME_PATTERN = r"^[a-zA-Z0-9\s\-'/&,]+$"
+_SPEND_CATEGORY_NAME_PATTERN = r"^[a-zA-Z0-9\s\-'/&]+$"
+
+
 # ============================================
 # COST CENTER SCHEMAS
 # ============================================
 
 
 class CostCenterBase(BaseModel):
-    name: str = Field(min_length=1, max_length=50, pattern=r"^[a-zA-Z0-9\s\-'/&,]+$")
+    name: str = Field(min_length=1, max_length=50, pattern=_COST_CENTER_NAME_PATTERN)
 
     @field_validator('name', mode='before')
     @classmethod
@@ -38,7 +44,7 @@ class CostCenterWithID(CostCenterBase):
 
 
 class SpendCategoryBase(BaseModel):
-    name: str = Field(min_length=1, max_length=50, pattern=r"^[a-zA-Z0-9\s\-'/&]+$")
+    name: str = Field(min_length=1, max_length=50, pattern=_SPEND_CATEGORY_NAME_PATTERN)
 
     @field_validator('name', mode='before')
     @classmethod
@@ -153,15 +159,18 @@ class TransactionWithID(TransactionBase):
 
 
 class TransactionCompact(BaseModel):
-    """Compact transaction representation with only IDs for relationships."""
+    """
+    Compact transaction representation with only IDs for relationships.
+    Fields not requested via /filter?fields=... are omitted from responses.
+    """
     id: int
-    date: datetime.date
-    description: str
-    amount: float
-    account: str
-    cost_center_id: int
-    spend_category_ids: List[int]
-    notes: Optional[str]
+    date: Optional[datetime.date] = None
+    description: Optional[str] = None
+    amount: Optional[float] = None
+    account: Optional[str] = None
+    cost_center_id: Optional[int] = None
+    spend_category_ids: Optional[List[int]] = None
+    notes: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -188,6 +197,21 @@ class PaginatedTransactionResponse(BaseModel):
     total_pages: int
 
 
+class TransactionCursor(BaseModel):
+    """Position of the last transaction on a cursor page."""
+    date: datetime.date
+    id: int
+
+
+class CursorTransactionResponse(BaseModel):
+    """Cursor-paginated response with compact transactions and metadata (no totals)."""
+    transactions: List[TransactionCompact]
+    cost_centers: List[CostCenterWithID]
+    spend_categories: List[SpendCategoryWithID]
+    limit: int
+    next_cursor: Optional[TransactionCursor] = None
+
+
 class CostCenterListResponse(BaseModel):
     cost_centers: List[CostCenterWithID]
     count: int